@@ -0,0 +1,103 @@
+"""Measure bot cold start: module import times and the start-up work done by main().
+
+Run from anywhere: python benchmarks/startup.py
+Exits with status 1 when a measurement is over its budget.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import config  # noqa: E402
+from db import init_db  # noqa: E402
+from translations import load_translation, LANGUAGES  # noqa: E402
+
+# Budgets in milliseconds. The import budget leaves out python-telegram-bot and its dependencies,
+# which the bot can't start without, and covers our own modules plus the standard library they use.
+IMPORT_BUDGET_MS = 80
+INIT_DB_BUDGET_MS = 1  # database already at SCHEMA_VERSION
+TRANSLATIONS_BUDGET_MS = 5
+THIRD_PARTY = ('telegram', 'httpx', 'httpcore', 'h11', 'anyio', 'certifi', 'idna', 'sniffio')
+IMPORT_RUNS = 5
+
+
+def parse_importtime(stderr):
+    # Rows of (cumulative microseconds, nesting depth, module name)
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+
+def import_times(module='bot', top=15):
+    """Return the fastest of IMPORT_RUNS imports of module in ms, not counting third-party packages."""
+    best = None
+    for _ in range(IMPORT_RUNS):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=BASE_DIR, capture_output=True, text=True, check=True)
+        rows = parse_importtime(result.stderr)
+        index, (total, depth, _) = next((i, row) for i, row in enumerate(rows) if row[2] == module)
+        # importtime prints children before their parent, walk back over the module's direct imports
+        third_party = 0
+        for us, child_depth, name in reversed(rows[:index]):
+            if child_depth <= depth:
+                break
+            if child_depth == depth + 1 and name.split('.')[0] in THIRD_PARTY:
+                third_party += us
+        if best is None or total - third_party < best[0] - best[1]:
+            best = (total, third_party, rows)
+
+    total, third_party, rows = best
+    own = (total - third_party) / 1000
+    print(f"import {module}: {total / 1000:.1f} ms, {own:.1f} ms without third-party packages")
+    print("slowest modules (cumulative):")
+    for us, _, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    return own
+
+
+def time_ms(func, number=100):
+    return min(timeit.repeat(func, number=1, repeat=number)) * 1000
+
+
+def init_db_times():
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(config, 'db_path', os.path.join(tmp, 'bench.db')):
+        fresh = time_ms(init_db, number=1)
+        cached = time_ms(init_db)
+    print(f"init_db: {fresh:.2f} ms on a new database, {cached:.2f} ms when user_version matches")
+    return cached
+
+
+def translation_times():
+    def load():
+        load_translation.cache_clear()
+        for lang in LANGUAGES:
+            load_translation(lang)
+    loaded = time_ms(load)
+    print(f"loading {len(LANGUAGES)} translation files: {loaded:.2f} ms")
+    return loaded
+
+
+def main():
+    results = [
+        ('import bot without third-party packages', import_times(), IMPORT_BUDGET_MS),
+        ('init_db at the current schema version', init_db_times(), INIT_DB_BUDGET_MS),
+        ('loading translations', translation_times(), TRANSLATIONS_BUDGET_MS),
+    ]
+    over = [(name, ms, budget) for name, ms, budget in results if ms > budget]
+    for name, ms, budget in over:
+        print(f"OVER BUDGET: {name} took {ms:.2f} ms, budget is {budget} ms")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import logging
 from datetime import datetime
 import random
@@ -14,8 +15,10 @@ from telegram.ext import (
     ConversationHandler
 )
 
+from config import config
 from friends import add_friends, handle_invite_code, get_user_rank
-from translations import translations
+from reminders import reminder_loop
+from translations import get_translation
 from db import init_db, add_user, get_user, get_leaderboard, update_user, get_today_tasks, add_task, mark_task_done, \
     get_streak_timestamp, update_streak_timestamp, is_user_exist
 
@@ -88,7 +91,7 @@ async def select_language(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def send_welcome_messages(query, context, user_id, message_number):
     lang = context.user_data.get('lang', 'en')
-    translation = translations[lang]
+    translation = get_translation(lang)
     welcome_message = translation[f'welcome_message_{message_number}']
     agree_button_text = translation[f'agree_button_{message_number}']
     keyboard = [
@@ -112,7 +115,7 @@ async def handle_welcome_message(update: Update, context: ContextTypes.DEFAULT_T
 async def send_profile(query, context, user_id, edit_message=True):
     user = get_user(user_id)
     lang = context.user_data.get('lang', 'en')
-    translation = translations[lang]
+    translation = get_translation(lang)
     keyboard = [
         [InlineKeyboardButton(translation['add_friends'], callback_data=str(ADD_FRIENDS))],
         [InlineKeyboardButton(translation['get_tasks'], callback_data=str(GET_TASKS))]
@@ -145,7 +148,7 @@ async def get_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         tasks = get_today_tasks(user_id)
 
     lang = context.user_data.get('lang', 'en')
-    translation = translations[lang]
+    translation = get_translation(lang)
 
     for i, (task_code, number, created_at, task_index) in enumerate(tasks):
         task_text = translation[task_code].format(number=number)
@@ -192,7 +195,7 @@ async def mark_task_done_handler(update: Update, context: ContextTypes.DEFAULT_T
 
     if task is None:
         lang = context.user_data.get('lang', 'en')
-        translation = translations[lang]
+        translation = get_translation(lang)
         await query.edit_message_text(translation['task_does_not_exist'])
         await delete_message_later(query, 1)
         return
@@ -203,7 +206,7 @@ async def mark_task_done_handler(update: Update, context: ContextTypes.DEFAULT_T
 
     # Get language and translation
     lang = context.user_data.get('lang', 'en')
-    translation = translations[lang]
+    translation = get_translation(lang)
 
     score = await add_points_for_task(multiplier, task_code, user_id)
 
@@ -259,16 +262,6 @@ def check_new_streak(user_id):
     update_streak_timestamp(user_id, current_timestamp)
 
 
-def read_token_from_file(file_name='token'):
-    try:
-        with open(file_name, 'r') as file:
-            token = file.read().strip()  # Читаем содержимое файла и удаляем лишние пробелы в начале и конце
-        return token
-    except FileNotFoundError:
-        print(f"Файл '{file_name}' не найден.")
-        return None
-
-
 async def go_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
@@ -281,11 +274,24 @@ async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await send_profile(update.message, context, user_id)
 
 
+async def start_reminders(application: Application) -> None:
+    # post_init runs before the application is started, so the task is ours to cancel on shutdown
+    application.bot_data['reminder_task'] = asyncio.create_task(reminder_loop(application.bot))
+
+
+async def stop_reminders(application: Application) -> None:
+    task = application.bot_data.pop('reminder_task', None)
+    if task is not None:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
 def main() -> None:
     """Run the bot."""
     init_db()
-    token = read_token_from_file()
-    application = Application.builder().token(token).build()
+    application = Application.builder().token(config.token) \
+        .post_init(start_reminders).post_shutdown(stop_reminders).build()
 
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("start", start)],
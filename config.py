@@ -0,0 +1,34 @@
+import os
+from functools import cached_property
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_file(path):
+    with open(path, 'r') as file:
+        return file.read().strip()  # Читаем содержимое файла и удаляем лишние пробелы в начале и конце
+
+
+class Config:
+    """Bot settings. Files are resolved against the project directory and read on first use."""
+
+    def __init__(self, base_dir=BASE_DIR):
+        self.base_dir = base_dir
+        self.translations_dir = os.path.join(base_dir, 'translations')
+        self.db_path = os.path.join(base_dir, 'fitness_bot.db')
+
+    @cached_property
+    def token(self):
+        path = os.path.join(self.base_dir, 'token')
+        try:
+            return read_file(path)
+        except FileNotFoundError:
+            print(f"Файл '{path}' не найден.")
+            return None
+
+    @cached_property
+    def secret(self):
+        return read_file(os.path.join(self.base_dir, 'secret'))
+
+
+config = Config()
@@ -1,9 +1,18 @@
 import sqlite3
 
+from config import config
+
+# Bump when the schema in init_db changes
+SCHEMA_VERSION = 2
+
 
 def init_db():
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return
     cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY,
@@ -13,9 +22,13 @@ def init_db():
                 streak INTEGER DEFAULT 0,
                 tasks_completed INTEGER DEFAULT 0,
                 strength_modifier REAL DEFAULT 1.0,
-                streak_timestamp INTEGER DEFAULT 0
+                streak_timestamp INTEGER DEFAULT 0,
+                blocked INTEGER DEFAULT 0
             )
             """)
+    cursor.execute("PRAGMA table_info(users)")
+    if 'blocked' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE users ADD COLUMN blocked INTEGER DEFAULT 0")
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY,
@@ -35,20 +48,31 @@ def init_db():
                 PRIMARY KEY (user1_id, user2_id)
             )
         ''')
+    cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reminder_checkpoints (
+                job TEXT PRIMARY KEY,
+                last_timestamp INTEGER,
+                last_id INTEGER,
+                sent INTEGER DEFAULT 0,
+                done INTEGER DEFAULT 0
+            )
+        ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_streak_timestamp ON users (streak_timestamp, id)")
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
 
 
 def add_user(user_id, username, lang):
-    with sqlite3.connect("fitness_bot.db") as conn:
+    with sqlite3.connect(config.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("INSERT OR IGNORE INTO users (id, username, lang) VALUES (?, ?, ?)", (user_id, username, lang))
-        cursor.execute("UPDATE users SET lang = ? WHERE id = ?", (lang, user_id))
+        cursor.execute("UPDATE users SET lang = ?, blocked = 0 WHERE id = ?", (lang, user_id))
         conn.commit()
 
 
 def get_user(id):
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     c = conn.cursor()
     c.execute('SELECT * FROM users WHERE id = ?', (id,))
     user = c.fetchone()
@@ -65,7 +89,7 @@ def get_user(id):
 
 
 def is_user_exist(user_id):
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     c = conn.cursor()
     c.execute('SELECT * FROM users WHERE id = ?', (user_id,))
     user = c.fetchone()
@@ -73,14 +97,14 @@ def is_user_exist(user_id):
     return user is not None
 
 def get_leaderboard():
-    with sqlite3.connect("fitness_bot.db") as conn:
+    with sqlite3.connect(config.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT username, points, streak FROM users ORDER BY points DESC")
         return cursor.fetchall()
 
 
 def update_user(user_id, points, streak, tasks_completed):
-    with sqlite3.connect("fitness_bot.db") as conn:
+    with sqlite3.connect(config.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("""
         UPDATE users
@@ -91,7 +115,7 @@ def update_user(user_id, points, streak, tasks_completed):
 
 
 def add_task(user_id, task_code, number, multiplier, created_at, task_index):
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     cursor = conn.cursor()
     cursor.execute('''
         INSERT INTO tasks (user_id, task_code, number, multiplier, created_at, task_index) VALUES (?, ?, ?, ?, ?, ?)
@@ -101,14 +125,14 @@ def add_task(user_id, task_code, number, multiplier, created_at, task_index):
 
 
 def mark_task_done(user_id, task_code):
-    with sqlite3.connect("fitness_bot.db") as conn:
+    with sqlite3.connect(config.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM tasks WHERE user_id = ? AND task_code = ?", (user_id, task_code))
         conn.commit()
 
 
 def get_today_tasks(user_id):
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     cursor = conn.cursor()
     cursor.execute('''
         SELECT task_code, number, multiplier, task_index FROM tasks WHERE user_id = ? AND status = 'pending' ORDER BY task_index
@@ -119,7 +143,7 @@ def get_today_tasks(user_id):
 
 
 def get_streak_timestamp(user_id):
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     cursor = conn.cursor()
     cursor.execute('''
         SELECT streak_timestamp FROM users WHERE id = ?
@@ -130,7 +154,7 @@ def get_streak_timestamp(user_id):
 
 
 def update_streak_timestamp(user_id, streak_timestamp):
-    with sqlite3.connect("fitness_bot.db") as conn:
+    with sqlite3.connect(config.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("""
         UPDATE users
@@ -141,7 +165,7 @@ def update_streak_timestamp(user_id, streak_timestamp):
 
 
 def accept_friend(user1_id, user2_id):
-    with sqlite3.connect("fitness_bot.db") as conn:
+    with sqlite3.connect(config.db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("INSERT OR IGNORE INTO friends (user1_id, user2_id) VALUES (?, ?)", (user1_id, user2_id))
         cursor.execute("INSERT OR IGNORE INTO friends (user1_id, user2_id) VALUES (?, ?)", (user2_id, user1_id))
@@ -149,7 +173,7 @@ def accept_friend(user1_id, user2_id):
 
 
 def get_friends(user_id):
-    conn = sqlite3.connect('fitness_bot.db')
+    conn = sqlite3.connect(config.db_path)
     cursor = conn.cursor()
     cursor.execute('''
         SELECT u.username, u.points, u.streak FROM friends f
@@ -160,3 +184,46 @@ def get_friends(user_id):
     conn.close()
     return friends
 
+
+def get_users_by_streak_timestamp(after, before, min_streak, limit):
+    # Keyset pagination over (streak_timestamp, id): `after` is the last (timestamp, id) seen,
+    # `before` is the exclusive upper bound of streak_timestamp
+    conn = sqlite3.connect(config.db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, lang, streak, streak_timestamp FROM users
+        WHERE (streak_timestamp, id) > (?, ?) AND streak_timestamp < ? AND streak >= ? AND blocked = 0
+        ORDER BY streak_timestamp, id
+        LIMIT ?
+    ''', (after[0], after[1], before, min_streak, limit))
+    users = cursor.fetchall()
+    conn.close()
+    return users
+
+
+def mark_user_blocked(user_id):
+    with sqlite3.connect(config.db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET blocked = 1 WHERE id = ?", (user_id,))
+        conn.commit()
+
+
+def get_reminder_checkpoint(job):
+    conn = sqlite3.connect(config.db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT last_timestamp, last_id, sent, done FROM reminder_checkpoints WHERE job = ?
+    ''', (job,))
+    checkpoint = cursor.fetchone()
+    conn.close()
+    return checkpoint
+
+
+def save_reminder_checkpoint(job, last_timestamp, last_id, sent, done=False):
+    with sqlite3.connect(config.db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        INSERT OR REPLACE INTO reminder_checkpoints (job, last_timestamp, last_id, sent, done)
+        VALUES (?, ?, ?, ?, ?)
+        """, (job, last_timestamp, last_id, sent, int(done)))
+        conn.commit()
@@ -1,9 +1,10 @@
 import base64
 
+from config import config
+
 
 def load_secret():
-    with open('secret', 'r') as file:
-        return file.read().strip()
+    return config.secret
 
 
 def encrypt_number(number):
@@ -3,7 +3,7 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from encryption import encrypt_number, decrypt_number
-from translations import translations
+from translations import get_translation
 from db import get_friends, accept_friend, get_user, is_user_exist
 
 
@@ -27,7 +27,7 @@ async def add_friends(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     friends = get_friends(user_id)
     referral_link = generate_referral_link(user_id)
     lang = context.user_data.get('lang', 'en')
-    translation = translations[lang]
+    translation = get_translation(lang)
     if len(friends) == 0:
         friends_text = translation['no_friends'] + "\n\n" + translation['referral_link'] + "\n<code>" + referral_link + "</code>"
     else:
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from translations import get_translation
+from db import get_users_by_streak_timestamp, get_reminder_checkpoint, save_reminder_checkpoint, mark_user_blocked
+
+logger = logging.getLogger(__name__)
+
+STREAK_PERIOD = 86400  # streak resets when no task was done for 24 hours, see check_new_streak
+REMINDER_INTERVAL = 3600
+STREAK_WARNING_AHEAD = 3 * 3600  # warn users whose streak ends in 3-4 hours
+NUDGE_HOUR = 15  # UTC, 18:00 in Moscow
+NUDGE_LATEST = 3 * 3600  # don't start a missed nudge later than 18:00 UTC
+STREAK_WARNING_CURSOR = 'streak_warning_cursor'  # checkpoint holding the last finished warning hour
+
+# Broadcast settings
+CHUNK_SIZE = 1000
+WORKERS = 8
+MESSAGES_PER_SECOND = 25  # Telegram allows about 30 messages per second for bulk notifications
+MAX_RETRIES = 3  # attempts per message after a timeout or network error
+
+
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        while True:
+            async with self.lock:
+                now = time.monotonic()
+                delay = self.next_slot - now
+                self.next_slot = max(now, self.next_slot) + self.interval
+                paused_until = self.paused_until
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.paused_until == paused_until:
+                return
+            # Telegram asked us to slow down while we were waiting, take a new slot after the pause
+
+    def pause(self, seconds):
+        # Telegram asked us to slow down, hold back every worker
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.next_slot = max(self.next_slot, self.paused_until)
+
+
+def current_timestamp():
+    return int(datetime.now().timestamp())
+
+
+async def send_reminder(bot, limiter, user_id, text):
+    attempts = 0
+    while True:
+        await limiter.wait()
+        try:
+            await bot.send_message(chat_id=user_id, text=text, parse_mode=ParseMode.HTML)
+            return True
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            limiter.pause(retry_after)
+        except Forbidden:
+            # User blocked the bot, don't message them again until they come back
+            mark_user_blocked(user_id)
+            return False
+        except BadRequest as e:
+            logger.warning("Failed to send reminder to %s: %s", user_id, e)
+            return False
+        except NetworkError as e:
+            # Timeouts and connection errors are worth another try
+            attempts += 1
+            if attempts > MAX_RETRIES:
+                logger.warning("Failed to send reminder to %s after %s retries: %s", user_id, MAX_RETRIES, e)
+                return False
+        except TelegramError as e:
+            logger.warning("Failed to send reminder to %s: %s", user_id, e)
+            return False
+
+
+async def reminder_worker(bot, limiter, queue, results):
+    while True:
+        user_id, text = await queue.get()
+        try:
+            sent = await send_reminder(bot, limiter, user_id, text)
+        except Exception:
+            logger.exception("Failed to send reminder to %s.", user_id)
+            sent = False
+        results.append(sent)
+        queue.task_done()
+
+
+async def broadcast(bot, limiter, job, lower, upper, render, min_streak=0, expires_in=None):
+    """Send render(translation, streak) to users with lower <= streak_timestamp < upper.
+
+    Users are read in chunks, progress is saved after every chunk, so a restarted bot continues
+    the job from the last finished chunk. With expires_in, users whose streak_timestamp is older
+    than expires_in seconds when their chunk is read are skipped.
+    """
+    checkpoint = get_reminder_checkpoint(job)
+    if checkpoint is None:
+        last = (lower, -1)
+        sent = 0
+    else:
+        last_timestamp, last_id, sent, done = checkpoint
+        if done:
+            return sent
+        last = (last_timestamp, last_id)
+        logger.info("Resuming %s from %s, %s reminders already sent.", job, last, sent)
+
+    queue = asyncio.Queue(maxsize=WORKERS * 2)
+    results = []
+    workers = [asyncio.create_task(reminder_worker(bot, limiter, queue, results)) for _ in range(WORKERS)]
+    try:
+        while True:
+            if expires_in is not None:
+                last = max(last, (current_timestamp() - expires_in, -1))
+            users = get_users_by_streak_timestamp(last, upper, min_streak, CHUNK_SIZE)
+            if not users:
+                break
+            for user_id, lang, streak, _ in users:
+                translation = get_translation(lang)
+                await queue.put((user_id, render(translation, streak)))
+            await queue.join()
+
+            last = (users[-1][3], users[-1][0])
+            sent += sum(results)
+            results.clear()
+            save_reminder_checkpoint(job, last[0], last[1], sent)
+        save_reminder_checkpoint(job, last[0], last[1], sent, done=True)
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+    logger.info("Finished %s, %s reminders sent.", job, sent)
+    return sent
+
+
+async def send_streak_warnings(bot, limiter, now):
+    # Work through every hour since the last finished one, so hours that started during a long
+    # broadcast or while the bot was down are not lost
+    cursor = get_reminder_checkpoint(STREAK_WARNING_CURSOR)
+    bucket = now - now % REMINDER_INTERVAL if cursor is None else cursor[0] + REMINDER_INTERVAL
+    sent = 0
+    while True:
+        # Streaks warned about in older hours have all expired by now
+        bucket = max(bucket, now - now % REMINDER_INTERVAL - STREAK_WARNING_AHEAD)
+        if bucket > now:
+            break
+        lower = bucket + STREAK_WARNING_AHEAD - STREAK_PERIOD
+        sent += await broadcast(bot, limiter, f"streak_warning_{bucket}", lower, lower + REMINDER_INTERVAL,
+                                lambda translation, streak: translation['streak_reminder'].format(streak=streak),
+                                min_streak=1, expires_in=STREAK_PERIOD)
+        save_reminder_checkpoint(STREAK_WARNING_CURSOR, bucket, 0, 0, done=True)
+        bucket += REMINDER_INTERVAL
+        now = current_timestamp()
+    return sent
+
+
+async def send_daily_nudges(bot, limiter, now):
+    # Nudge users whose streak ran out during the last day, so everyone is nudged once per lapse
+    nudge_at = now - (now - NUDGE_HOUR * 3600) % STREAK_PERIOD
+    job = f"daily_nudge_{nudge_at}"
+    if now - nudge_at > NUDGE_LATEST and get_reminder_checkpoint(job) is None:
+        return 0
+    return await broadcast(bot, limiter, job, nudge_at - 2 * STREAK_PERIOD, nudge_at - STREAK_PERIOD,
+                           lambda translation, streak: translation['daily_nudge'])
+
+
+async def run_every(interval, send, bot, limiter, offset=0):
+    while True:
+        try:
+            await send(bot, limiter, current_timestamp())
+        except Exception:
+            logger.exception("Reminder job %s failed.", send.__name__)
+        now = current_timestamp()
+        await asyncio.sleep(interval - (now - offset) % interval)
+
+
+async def reminder_loop(bot):
+    limiter = RateLimiter(MESSAGES_PER_SECOND)
+    await asyncio.gather(
+        run_every(REMINDER_INTERVAL, send_streak_warnings, bot, limiter),
+        run_every(STREAK_PERIOD, send_daily_nudges, bot, limiter, offset=NUDGE_HOUR * 3600),
+    )
@@ -1,16 +1,25 @@
+import os
+import tempfile
 import unittest
 import sqlite3
-from db import init_db, add_user, get_user, update_user, add_task, mark_task_done, get_today_tasks, get_leaderboard
+from unittest import mock
+
+from config import config
+from db import SCHEMA_VERSION, init_db, add_user, get_user, update_user, add_task, mark_task_done, get_today_tasks, get_leaderboard, \
+    update_streak_timestamp, get_users_by_streak_timestamp, get_reminder_checkpoint, save_reminder_checkpoint
 
 
 class TestDataBase(unittest.TestCase):
     def setUp(self):
+        # Never touch the bot's real database
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(config, 'db_path', os.path.join(self.tmp.name, 'fitness_bot.db'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
         init_db()
-        self.conn = sqlite3.connect('fitness_bot.db')
+        self.conn = sqlite3.connect(config.db_path)
         self.cursor = self.conn.cursor()
-        self.cursor.execute('DELETE FROM users')
-        self.cursor.execute('DELETE FROM tasks')
-        self.conn.commit()
 
     def tearDown(self):
         self.conn.close()
@@ -74,6 +83,60 @@ class TestDataBase(unittest.TestCase):
         self.assertEqual(leaderboard[1][0], 'leader2')
         self.assertEqual(leaderboard[1][1], 150)
 
+    def test_get_users_by_streak_timestamp_pages_through_range(self):
+        for user_id, streak, timestamp in [(9, 3, 1000), (10, 1, 1000), (11, 0, 1500), (12, 2, 2000), (13, 4, 3000)]:
+            add_user(user_id, f'user{user_id}', 'en')
+            update_user(user_id, 0, streak, 0)
+            update_streak_timestamp(user_id, timestamp)
+        first_page = get_users_by_streak_timestamp((1000, -1), 3000, 1, 2)
+        self.assertEqual([user[0] for user in first_page], [9, 10])
+        last_user = first_page[-1]
+        second_page = get_users_by_streak_timestamp((last_user[3], last_user[0]), 3000, 1, 2)
+        self.assertEqual([user[0] for user in second_page], [12])
+        self.assertEqual(second_page[0], (12, 'en', 2, 2000))
+
+    def test_save_reminder_checkpoint_overwrites_progress(self):
+        self.assertIsNone(get_reminder_checkpoint('job'))
+        save_reminder_checkpoint('job', 1000, 9, 1)
+        save_reminder_checkpoint('job', 2000, 12, 2, done=True)
+        self.assertEqual(get_reminder_checkpoint('job'), (2000, 12, 2, 1))
+
+    def test_init_db_sets_schema_version(self):
+        init_db()
+        self.cursor.execute('PRAGMA user_version')
+        self.assertEqual(self.cursor.fetchone()[0], SCHEMA_VERSION)
+
+
+class TestSchemaVersion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'fitness_bot.db')
+        patcher = mock.patch.object(config, 'db_path', self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def get_tables(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def test_init_db_upgrades_old_schema(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, lang TEXT, points INTEGER DEFAULT 0, '
+                         'streak INTEGER DEFAULT 0, tasks_completed INTEGER DEFAULT 0, '
+                         'strength_modifier REAL DEFAULT 1.0, streak_timestamp INTEGER DEFAULT 0)')
+            conn.execute("INSERT INTO users (id, username, lang) VALUES (1, 'olduser', 'en')")
+        init_db()
+        self.assertIn('reminder_checkpoints', self.get_tables())
+        self.assertEqual(get_users_by_streak_timestamp((0, -1), 1, 0, 10), [(1, 'en', 0, 0)])
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], SCHEMA_VERSION)
+
+    def test_init_db_skips_schema_when_version_matches(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        init_db()
+        self.assertEqual(self.get_tables(), set())
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
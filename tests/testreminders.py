@@ -0,0 +1,227 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+import sqlite3
+from unittest import mock
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, TimedOut
+
+import reminders
+from config import config
+from db import init_db, add_user, update_user, update_streak_timestamp, get_reminder_checkpoint, \
+    save_reminder_checkpoint
+from reminders import RateLimiter, broadcast, send_streak_warnings, send_daily_nudges, STREAK_PERIOD, NUDGE_HOUR, \
+    MAX_RETRIES, STREAK_WARNING_CURSOR
+
+
+class FakeBot:
+    def __init__(self, errors=None, on_send=None):
+        self.sent = []
+        self.errors = errors or {}
+        self.on_send = on_send
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        self.sent.append(chat_id)
+        if self.on_send:
+            self.on_send(chat_id)
+
+
+def render(translation, streak):
+    return translation['daily_nudge']
+
+
+class TestReminders(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Never touch the bot's real database
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(config, 'db_path', os.path.join(self.tmp.name, 'fitness_bot.db'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        init_db()
+        self.conn = sqlite3.connect(config.db_path)
+        self.cursor = self.conn.cursor()
+        self.limiter = RateLimiter(10000)
+        self.now = 0
+        clock = mock.patch.object(reminders, 'current_timestamp', lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def add_users(self, users):
+        for user_id, streak, timestamp in users:
+            add_user(user_id, f'user{user_id}', 'en')
+            update_user(user_id, 0, streak, 0)
+            update_streak_timestamp(user_id, timestamp)
+
+    async def test_rate_limiter_spaces_out_calls(self):
+        limiter = RateLimiter(100)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    async def test_rate_limiter_pause_holds_next_call(self):
+        limiter = RateLimiter(10000)
+        limiter.pause(0.05)
+        start = time.monotonic()
+        await limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    async def test_rate_limiter_pause_holds_waiting_workers(self):
+        limiter = RateLimiter(10)
+        await limiter.wait()
+        start = time.monotonic()
+        waiter = asyncio.create_task(limiter.wait())
+        await asyncio.sleep(0.01)
+        limiter.pause(0.2)
+        await waiter
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    async def test_broadcast_sends_to_users_in_range(self):
+        self.add_users([(1, 1, 999), (2, 1, 1000), (3, 1, 1500), (4, 1, 2000)])
+        bot = FakeBot()
+        with mock.patch.object(reminders, 'CHUNK_SIZE', 1):
+            sent = await broadcast(bot, self.limiter, 'job', 1000, 2000, render)
+        self.assertEqual(sent, 2)
+        self.assertEqual(sorted(bot.sent), [2, 3])
+        self.assertEqual(get_reminder_checkpoint('job'), (1500, 3, 2, 1))
+
+    async def test_broadcast_resumes_from_checkpoint(self):
+        self.add_users([(1, 1, 1000), (2, 1, 1000), (3, 1, 1000), (4, 1, 1000)])
+        save_reminder_checkpoint('job', 1000, 2, 2)
+        bot = FakeBot()
+        sent = await broadcast(bot, self.limiter, 'job', 1000, 2000, render)
+        self.assertEqual(sorted(bot.sent), [3, 4])
+        self.assertEqual(sent, 4)
+
+    async def test_broadcast_skips_finished_job(self):
+        self.add_users([(1, 1, 1000)])
+        save_reminder_checkpoint('job', 1000, 1, 1, done=True)
+        bot = FakeBot()
+        self.assertEqual(await broadcast(bot, self.limiter, 'job', 1000, 2000, render), 1)
+        self.assertEqual(bot.sent, [])
+
+    async def test_broadcast_retries_after_flood_control(self):
+        self.add_users([(1, 1, 1000)])
+        bot = FakeBot({1: [RetryAfter(0)]})
+        self.assertEqual(await broadcast(bot, self.limiter, 'job', 1000, 2000, render), 1)
+        self.assertEqual(bot.sent, [1])
+
+    async def test_broadcast_retries_timeouts(self):
+        self.add_users([(1, 1, 1000), (2, 1, 1000)])
+        bot = FakeBot({1: [TimedOut()] * MAX_RETRIES, 2: [TimedOut()] * (MAX_RETRIES + 1)})
+        with self.assertLogs('reminders', level='WARNING'):
+            self.assertEqual(await broadcast(bot, self.limiter, 'job', 1000, 2000, render), 1)
+        self.assertEqual(bot.sent, [1])
+
+    async def test_broadcast_does_not_retry_bad_requests(self):
+        self.add_users([(1, 1, 1000)])
+        bot = FakeBot({1: [BadRequest('chat not found'), BadRequest('chat not found')]})
+        with self.assertLogs('reminders', level='WARNING'):
+            self.assertEqual(await broadcast(bot, self.limiter, 'job', 1000, 2000, render), 0)
+        self.assertEqual(len(bot.errors[1]), 1)
+
+    async def test_blocked_users_are_skipped_by_later_jobs(self):
+        self.add_users([(1, 1, 1000), (2, 1, 1000)])
+        bot = FakeBot({1: [Forbidden('blocked')]})
+        self.assertEqual(await broadcast(bot, self.limiter, 'job1', 1000, 2000, render), 1)
+        bot = FakeBot()
+        await broadcast(bot, self.limiter, 'job2', 1000, 2000, render)
+        self.assertEqual(bot.sent, [2])
+
+    async def test_unexpected_error_does_not_stall_broadcast(self):
+        self.add_users([(user_id, 1, 1000) for user_id in range(1, 21)])
+        bot = FakeBot({user_id: [ValueError('boom')] for user_id in range(1, 11)})
+        with self.assertLogs('reminders', level='ERROR'):
+            sent = await broadcast(bot, self.limiter, 'job', 1000, 2000, render)
+        self.assertEqual(sent, 10)
+        self.assertEqual(sorted(bot.sent), list(range(11, 21)))
+
+    async def test_streak_warnings_cover_streaks_ending_in_three_to_four_hours(self):
+        bucket = 1000 * 3600
+        self.add_users([
+            (1, 1, bucket - 21 * 3600 - 1),
+            (2, 1, bucket - 21 * 3600),
+            (3, 1, bucket - 20 * 3600 - 1),
+            (4, 1, bucket - 20 * 3600),
+            (5, 0, bucket - 21 * 3600),
+        ])
+        bot = FakeBot()
+        self.now = bucket + 120
+        await send_streak_warnings(bot, self.limiter, self.now)
+        self.assertEqual(sorted(bot.sent), [2, 3])
+
+    async def test_streak_warnings_catch_up_on_hours_missed_during_a_long_job(self):
+        bucket = 1000 * 3600
+        self.add_users([(1, 1, bucket - 21 * 3600), (2, 1, bucket - 20 * 3600)])
+
+        def on_send(user_id):
+            # The first hour's broadcast runs past the next hour boundary
+            if user_id == 1:
+                self.now = bucket + 3600 + 60
+
+        bot = FakeBot(on_send=on_send)
+        self.now = bucket + 60
+        await send_streak_warnings(bot, self.limiter, self.now)
+        self.assertEqual(bot.sent, [1, 2])
+        self.assertEqual(get_reminder_checkpoint(STREAK_WARNING_CURSOR)[0], bucket + 3600)
+
+    async def test_streak_warnings_resume_unfinished_hour_after_restart(self):
+        bucket = 1000 * 3600
+        self.add_users([(1, 1, bucket - 21 * 3600), (2, 1, bucket - 21 * 3600), (3, 1, bucket - 20 * 3600)])
+        save_reminder_checkpoint(STREAK_WARNING_CURSOR, bucket - 3600, 0, 0, done=True)
+        save_reminder_checkpoint(f'streak_warning_{bucket}', bucket - 21 * 3600, 1, 1)
+        bot = FakeBot()
+        self.now = bucket + 3600 + 60
+        await send_streak_warnings(bot, self.limiter, self.now)
+        self.assertEqual(bot.sent, [2, 3])
+
+    async def test_streak_warnings_skip_expired_streaks(self):
+        bucket = 1000 * 3600
+        self.add_users([(1, 1, bucket - 21 * 3600), (2, 1, bucket - 20 * 3600 - 1)])
+        save_reminder_checkpoint(STREAK_WARNING_CURSOR, bucket - 3600, 0, 0, done=True)
+        bot = FakeBot()
+        # Half an hour after user 1's streak ran out
+        self.now = bucket + 3 * 3600 + 1800
+        await send_streak_warnings(bot, self.limiter, self.now)
+        self.assertEqual(bot.sent, [2])
+
+    async def test_daily_nudges_reach_each_lapsed_user_once(self):
+        nudge_at = 1000 * STREAK_PERIOD + NUDGE_HOUR * 3600
+        self.add_users([
+            (1, 0, 0),
+            (2, 0, nudge_at - 2 * STREAK_PERIOD),
+            (3, 0, nudge_at - STREAK_PERIOD - 1),
+            (4, 0, nudge_at - STREAK_PERIOD),
+        ])
+        bot = FakeBot()
+        await send_daily_nudges(bot, self.limiter, nudge_at + 60)
+        self.assertEqual(sorted(bot.sent), [2, 3])
+
+    async def test_missed_daily_nudge_is_not_started_late(self):
+        nudge_at = 1000 * STREAK_PERIOD + NUDGE_HOUR * 3600
+        self.add_users([(1, 0, nudge_at - STREAK_PERIOD - 1)])
+        bot = FakeBot()
+        await send_daily_nudges(bot, self.limiter, nudge_at + 12 * 3600)
+        self.assertEqual(bot.sent, [])
+
+    async def test_streak_warnings_skip_hours_that_have_fully_expired(self):
+        bucket = 1000 * 3600
+        self.add_users([(1, 1, bucket - 30 * 3600), (2, 1, bucket - 20 * 3600 - 1)])
+        save_reminder_checkpoint(STREAK_WARNING_CURSOR, bucket - 48 * 3600, 0, 0, done=True)
+        bot = FakeBot()
+        self.now = bucket + 3 * 3600 + 60
+        await send_streak_warnings(bot, self.limiter, self.now)
+        self.assertEqual(bot.sent, [2])
+        self.assertIsNone(get_reminder_checkpoint(f'streak_warning_{bucket - 3600}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
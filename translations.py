@@ -1,7 +1,19 @@
 # Load translations
 import json
+import os
+from functools import cache
 
-translations = {}
-for lang in ['en', 'ru']:
-    with open(f'translations/{lang}.json', 'r', encoding='utf-8') as f:
-        translations[lang] = json.load(f)
\ No newline at end of file
+from config import config
+
+LANGUAGES = ('en', 'ru')
+
+
+@cache
+def load_translation(lang):
+    with open(os.path.join(config.translations_dir, f'{lang}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_translation(lang):
+    """Return the strings for lang, falling back to English. Files are read on first use."""
+    return load_translation(lang if lang in LANGUAGES else 'en')